@@ -0,0 +1,960 @@
+#!/usr/bin/env python3
+# CGMiner-RS 监控客户端
+#
+# 通过 REST API（/api/v1/status、/api/v1/devices、/api/v1/pools）轮询矿机状态，
+# 支持一次性状态查询、健康检查、性能报告以及持续监控 + 邮件告警。
+#
+# 三个端点的抓取通过 aiohttp + asyncio.gather 并发执行，
+# 每个轮询周期只需约一次往返延迟。
+#
+# 用法示例:
+#   ./cgminer_monitor.py status
+#   ./cgminer_monitor.py health --host 192.168.1.100
+#   ./cgminer_monitor.py monitor --interval 60 --smtp-host smtp.example.com ...
+
+import argparse
+import array
+import asyncio
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# smtplib / email.mime / urllib 只在用到的路径里惰性导入，
+# 让 status/health 这类一次性 CLI 调用启动更快。
+
+try:
+    import aiohttp
+except ImportError:
+    # 传输层按 aiohttp → httpx → 标准库+线程池 的顺序回退
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    # orjson 对设备/矿池数组的解析比标准库快数倍，但不是硬依赖
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+try:
+    import numpy as np
+except ImportError:
+    # 无 numpy 时聚合统计退回纯 Python 实现
+    np = None
+
+try:
+    import ijson
+except ImportError:
+    # 无 ijson 时设备列表整体解析（大矿机上峰值内存更高）
+    ijson = None
+
+
+def _stats(values: Any) -> Optional[Dict[str, float]]:
+    """计算 min/max/avg 汇总；有 numpy 时为一次向量操作"""
+    if len(values) == 0:
+        return None
+    if np is not None:
+        arr = np.asarray(values, dtype=np.float32)
+        return {"min": float(arr.min()), "max": float(arr.max()),
+                "avg": float(arr.mean())}
+    return {"min": min(values), "max": max(values),
+            "avg": sum(values) / len(values)}
+
+
+@dataclass(slots=True)
+class Device:
+    """单台设备的状态记录
+
+    固定模式的 __slots__ 属性访问比热路径上反复的 dict.get
+    哈希查找（含默认值分支）更快，也省掉每设备一个 dict。
+    """
+    device_id: Any
+    name: str
+    status: str
+    temperature: float
+    hashrate: float
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "Device":
+        return cls(
+            device_id=raw.get("device_id"),
+            name=raw.get("name", ""),
+            status=raw.get("status", ""),
+            temperature=float(raw.get("temperature") or 0.0),
+            hashrate=float(raw.get("hashrate") or 0.0),
+        )
+
+
+class DeviceWalk(NamedTuple):
+    """单次设备遍历的聚合结果，供健康检查、告警和指标采集共用"""
+    temps: Any       # list 或 np.ndarray
+    hashrates: Any   # list 或 np.ndarray
+    healthy_count: int
+    temp_critical: List[Tuple[Any, float]]            # (device_id, 温度)
+    temp_warning: List[Tuple[Any, float]]             # (device_id, 温度)
+    hashrate_low: List[Tuple[Any, float, bool, bool]]  # (device_id, 算力, 在挖矿, 温度超限)
+
+
+class MetricsRing:
+    """预分配的二进制环形缓冲，按列（SoA）存放标量性能序列
+
+    以前每个样本是一个 Python dict（外加嵌套列表），24 小时窗口
+    就是上千个碎片化分配；这里固定 1440 槽（60s 间隔下 24 小时），
+    写满后覆盖最旧样本，没有逐周期淘汰，报告聚合走连续内存。
+    有 numpy 时用结构化数组，否则退回 array.array 列。
+    """
+
+    SLOTS = 1440
+
+    # (字段名, array 类型码, numpy dtype)
+    FIELDS = (
+        ("ts", "d", "f8"),
+        ("hashrate", "d", "f8"),
+        ("accepted", "Q", "u8"),
+        ("rejected", "Q", "u8"),
+        ("hw_errors", "Q", "u8"),
+        ("active", "I", "u4"),
+        ("uptime", "Q", "u8"),
+    )
+
+    def __init__(self, slots: int = SLOTS):
+        self.slots = slots
+        self._next = 0   # 下一个写入槽
+        self._count = 0
+        if np is not None:
+            self._data = np.zeros(
+                slots, dtype=np.dtype([(name, dt) for name, _, dt in self.FIELDS]))
+        else:
+            self._cols = {name: array.array(code, bytes(slots * array.array(code).itemsize))
+                          for name, code, _ in self.FIELDS}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, **values: Any) -> None:
+        """写入一行样本，写满后覆盖最旧槽"""
+        i = self._next
+        if np is not None:
+            row = self._data[i]
+            for name, value in values.items():
+                row[name] = value
+        else:
+            for name, value in values.items():
+                self._cols[name][i] = value
+        self._next = (i + 1) % self.slots
+        self._count = min(self._count + 1, self.slots)
+
+    def column(self, name: str) -> Any:
+        """按时间顺序（旧 → 新）返回一列"""
+        if np is not None:
+            col = self._data[name]
+            if self._count < self.slots:
+                return col[:self._count]
+            return np.concatenate((col[self._next:], col[:self._next]))
+        col = self._cols[name]
+        if self._count < self.slots:
+            return col[:self._count]
+        return col[self._next:] + col[:self._next]
+
+
+class JsonFormatter(logging.Formatter):
+    """把日志记录格式化为单行 JSON，下游处理器无需正则解析"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return _json_dumps(entry)
+
+
+# 同一端点在 TTL 内的重复请求直接复用缓存结果
+CACHE_TTL = 1.0  # 秒
+
+# 同一条告警在冷却窗口内只发送一次邮件（日志仍然每次记录）
+ALERT_COOLDOWN = 300.0  # 秒
+
+# 告警阈值
+TEMP_ALERT_THRESHOLD = 80.0      # °C
+TEMP_CRITICAL_THRESHOLD = 85.0   # °C
+HASHRATE_ALERT_THRESHOLD = 15.0  # 单设备最低算力
+
+
+class CGMinerMonitor:
+    """CGMiner-RS REST API 监控客户端"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080,
+                 auth_token: Optional[str] = None):
+        self.base_url = f"http://{host}:{port}"
+        self.auth_token = auth_token
+        self.headers: Dict[str, str] = {}
+        if auth_token:
+            self.headers["Authorization"] = f"Bearer {auth_token}"
+        self.performance_history = MetricsRing()
+        # 最近一次采样的设备遍历结果，报告的设备统计取自这里
+        self._last_walk: Optional[DeviceWalk] = None
+        self.logger = logging.getLogger("cgminer-monitor")
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._httpx_client: Optional["httpx.AsyncClient"] = None
+        # 两个 HTTP 客户端都不可用时的回退抓取线程池（懒创建）
+        self._fetch_pool: Optional[ThreadPoolExecutor] = None
+        # 邮件发送线程池（单线程，SMTP 连接只在该线程内使用）
+        self._mail_pool: Optional[ThreadPoolExecutor] = None
+        self._smtp: Optional["smtplib.SMTP"] = None
+        # 端点路径 -> (抓取时间, 数据) 的短 TTL 缓存
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        # 服务端返回 404 后不再尝试聚合快照端点
+        self._snapshot_supported = True
+        # 告警标识 (类型, 级别, 设备) -> 最近一次发送时间（monotonic），用于冷却去重
+        self._alert_cooldown: Dict[Tuple[str, str, Any], float] = {}
+        # WebSocket 推送模式下的状态缓存快照
+        self.last_status: Optional[Dict[str, Any]] = None
+        self.last_devices: List[Device] = []
+        self.last_pools: List[Dict[str, Any]] = []
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """返回长连接会话（懒创建），所有请求复用同一个连接池"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=4, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+        return self._session
+
+    def _get_httpx(self) -> "httpx.AsyncClient":
+        """返回 httpx 异步客户端（懒创建）
+
+        开启 HTTP/2 后三个并发抓取可以在一条 TLS 连接上多路复用；
+        缺少 h2 扩展时退回 HTTP/1.1 但仍复用连接。
+        """
+        if self._httpx_client is None or self._httpx_client.is_closed:
+            limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+            try:
+                self._httpx_client = httpx.AsyncClient(
+                    http2=True, base_url=self.base_url, headers=self.headers,
+                    timeout=10.0, limits=limits)
+            except ImportError:
+                self._httpx_client = httpx.AsyncClient(
+                    base_url=self.base_url, headers=self.headers,
+                    timeout=10.0, limits=limits)
+        return self._httpx_client
+
+    def _get_fetch_pool(self) -> ThreadPoolExecutor:
+        """返回回退抓取线程池（懒创建），与 gather 配合实现并发"""
+        if self._fetch_pool is None:
+            self._fetch_pool = ThreadPoolExecutor(
+                max_workers=3, thread_name_prefix="cgminer-fetch")
+        return self._fetch_pool
+
+    def _get_mail_pool(self) -> ThreadPoolExecutor:
+        """返回邮件发送线程池（懒创建），发信不阻塞监控循环"""
+        if self._mail_pool is None:
+            self._mail_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="cgminer-mail")
+        return self._mail_pool
+
+    async def close(self) -> None:
+        """关闭 HTTP 会话和后台线程池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._httpx_client is not None and not self._httpx_client.is_closed:
+            await self._httpx_client.aclose()
+        self._httpx_client = None
+        if self._fetch_pool is not None:
+            self._fetch_pool.shutdown(wait=False)
+            self._fetch_pool = None
+        if self._mail_pool is not None:
+            # 等未发完的告警邮件发完再退出
+            self._mail_pool.shutdown(wait=True)
+            self._mail_pool = None
+        self._drop_smtp()
+
+    async def _fetch_json(self, path: str) -> Any:
+        """GET 一个 API 端点并解包 ApiResponse 外层结构"""
+        if aiohttp is not None:
+            session = self._get_session()
+            async with session.get(self.base_url + path) as response:
+                response.raise_for_status()
+                body = await response.read()
+            return self._unwrap(path, _json_loads(body))
+
+        if httpx is not None:
+            response = await self._get_httpx().get(path)
+            response.raise_for_status()
+            return self._unwrap(path, _json_loads(response.content))
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_fetch_pool(), self._fetch_json_sync, path)
+
+    def _fetch_json_sync(self, path: str) -> Any:
+        """标准库同步抓取，在线程池内执行（aiohttp 不可用时的回退）"""
+        import urllib.request
+
+        request = urllib.request.Request(self.base_url + path, headers=self.headers)
+        with urllib.request.urlopen(request, timeout=10) as response:
+            payload = _json_loads(response.read())
+        return self._unwrap(path, payload)
+
+    @staticmethod
+    def _unwrap(path: str, payload: Dict[str, Any]) -> Any:
+        """解包 ApiResponse 外层结构"""
+        if not payload.get("success", False):
+            raise RuntimeError(f"API error on {path}: {payload.get('error')}")
+        return payload.get("data")
+
+    async def _get_cached(self, path: str,
+                          fetch: Optional[Any] = None) -> Any:
+        """带短 TTL 缓存的 GET：同一周期内的重复消费只打一次网络
+
+        fetch 允许调用方指定专用抓取协程（如设备列表的流式解析）。
+        """
+        cached = self._cache.get(path)
+        if cached is not None and time.monotonic() - cached[0] < CACHE_TTL:
+            return cached[1]
+        data = await (fetch() if fetch is not None else self._fetch_json(path))
+        self._cache[path] = (time.monotonic(), data)
+        return data
+
+    async def get_status(self) -> Dict[str, Any]:
+        """获取系统状态"""
+        return await self._get_cached("/api/v1/status")
+
+    async def get_devices(self) -> List[Device]:
+        """获取所有设备状态
+
+        有 ijson 时流式解析设备数组，大矿机上避免把整个响应体
+        缓冲到内存后再解析。
+        """
+        fetch = None
+        if ijson is not None and aiohttp is not None:
+            fetch = self._fetch_devices_streaming
+        raw = await self._get_cached("/api/v1/devices", fetch) or []
+        return [Device.from_dict(d) for d in raw]
+
+    async def _fetch_devices_streaming(self) -> List[Dict[str, Any]]:
+        """边收包边解析 data 数组里的设备记录（ijson 异步模式）
+
+        出错响应由 raise_for_status 拦截，因此这里不再检查
+        ApiResponse 的 success 字段。
+        """
+        session = self._get_session()
+        async with session.get(self.base_url + "/api/v1/devices") as response:
+            response.raise_for_status()
+            return [device async for device
+                    in ijson.items(response.content, "data.item")]
+
+    async def get_pools(self) -> List[Dict[str, Any]]:
+        """获取所有矿池状态"""
+        return await self._get_cached("/api/v1/pools") or []
+
+    async def get_snapshot(self) -> Optional[Tuple[Optional[Dict[str, Any]],
+                                                   List[Device],
+                                                   List[Dict[str, Any]]]]:
+        """一次请求获取 (status, devices, pools) 聚合快照
+
+        旧版本服务端没有 /api/v1/snapshot，收到 404 后返回 None
+        并在本次运行内不再尝试，调用方回退到三端点抓取。
+        """
+        if not self._snapshot_supported:
+            return None
+        try:
+            data = await self._get_cached("/api/v1/snapshot")
+        except Exception as e:
+            # aiohttp.ClientResponseError 带 status，urllib.error.HTTPError 带 code，
+            # httpx.HTTPStatusError 带 response.status_code
+            status_code = (getattr(e, "status", None)
+                           or getattr(e, "code", None)
+                           or getattr(getattr(e, "response", None),
+                                      "status_code", None))
+            if status_code == 404:
+                self._snapshot_supported = False
+                self.logger.info("服务端不支持 /api/v1/snapshot，回退到三端点抓取")
+                return None
+            raise
+        if data is None:
+            return None
+        return (data.get("status"),
+                [Device.from_dict(d) for d in data.get("devices") or []],
+                data.get("pools") or [])
+
+    async def check_health(self) -> Dict[str, Any]:
+        """综合健康检查：系统状态 + 设备 + 矿池"""
+        status, devices, pools = await asyncio.gather(
+            self.get_status(), self.get_devices(), self.get_pools(),
+            return_exceptions=True,
+        )
+
+        health: Dict[str, Any] = {"healthy": True, "issues": []}
+
+        if isinstance(status, BaseException):
+            health["healthy"] = False
+            health["issues"].append(f"无法获取系统状态: {status}")
+            status = None
+        if isinstance(devices, BaseException):
+            health["healthy"] = False
+            health["issues"].append(f"无法获取设备列表: {devices}")
+            devices = []
+        if isinstance(pools, BaseException):
+            health["healthy"] = False
+            health["issues"].append(f"无法获取矿池列表: {pools}")
+            pools = []
+
+        if status and status.get("mining_state") not in ("Running", "Mining"):
+            health["healthy"] = False
+            health["issues"].append(f"挖矿状态异常: {status.get('mining_state')}")
+
+        walk = self._walk_devices(devices)
+        for device_id, temp in walk.temp_critical:
+            health["healthy"] = False
+            health["issues"].append(f"设备 {device_id} 温度过高: {temp:.1f}°C")
+        for device_id, hashrate, _mining, temp_over in walk.hashrate_low:
+            if not temp_over:
+                health["issues"].append(f"设备 {device_id} 算力过低: {hashrate:.1f}")
+        health["healthy_devices"] = walk.healthy_count
+        health["total_devices"] = len(devices)
+
+        # 只需要计数，不必物化一个新列表
+        connected_count = sum(1 for p in pools if p.get("status") == "Connected")
+        if pools and connected_count == 0:
+            health["healthy"] = False
+            health["issues"].append("没有已连接的矿池")
+        health["connected_pools"] = connected_count
+
+        return health
+
+    @staticmethod
+    def _walk_devices(devices: List[Device]) -> DeviceWalk:
+        """单次遍历设备列表，产出所有下游消费方需要的聚合数据
+
+        健康检查、告警检查和指标采集此前各自遍历一遍设备并重复做
+        同样的字典取值；这里融合成一趟，温度/算力向量与问题设备
+        列表一起产出。
+        """
+        temps: List[float] = []
+        hashrates: List[float] = []
+        healthy = 0
+        temp_critical: List[Tuple[Any, float]] = []
+        temp_warning: List[Tuple[Any, float]] = []
+        hashrate_low: List[Tuple[Any, float, bool, bool]] = []
+
+        for device in devices:
+            temp = device.temperature
+            hashrate = device.hashrate
+            mining = device.status == "Mining"
+            device_id = device.device_id
+            temps.append(temp)
+            hashrates.append(hashrate)
+
+            temp_over = temp >= TEMP_CRITICAL_THRESHOLD
+            if temp_over:
+                temp_critical.append((device_id, temp))
+            elif temp >= TEMP_ALERT_THRESHOLD:
+                temp_warning.append((device_id, temp))
+            if hashrate < HASHRATE_ALERT_THRESHOLD:
+                hashrate_low.append((device_id, hashrate, mining, temp_over))
+            elif mining and not temp_over:
+                healthy += 1
+
+        if np is not None:
+            # SoA 布局，供 _stats / 报告做向量聚合
+            return DeviceWalk(np.asarray(temps, dtype=np.float32),
+                              np.asarray(hashrates, dtype=np.float32),
+                              healthy, temp_critical, temp_warning, hashrate_low)
+        return DeviceWalk(temps, hashrates, healthy,
+                          temp_critical, temp_warning, hashrate_low)
+
+    def check_alerts(self, status: Optional[Dict[str, Any]],
+                     devices: List[Device],
+                     pools: List[Dict[str, Any]],
+                     walk: Optional[DeviceWalk] = None) -> List[Dict[str, Any]]:
+        """根据当前快照生成告警列表
+
+        调用方已有 _walk_devices 结果时传入 walk 复用，避免重复遍历。
+        """
+        alerts: List[Dict[str, Any]] = []
+        # 每次检查只取一次时间戳，避免逐告警的系统调用和格式化
+        now_iso = datetime.now().isoformat()
+
+        if walk is None:
+            walk = self._walk_devices(devices)
+        for device_id, temp in walk.temp_critical:
+            alerts.append({
+                "type": "temperature",
+                "severity": "critical",
+                "device_id": device_id,
+                "message": f"设备 {device_id} 温度达到 {temp:.1f}°C",
+                "timestamp": now_iso,
+            })
+        for device_id, temp in walk.temp_warning:
+            alerts.append({
+                "type": "temperature",
+                "severity": "warning",
+                "device_id": device_id,
+                "message": f"设备 {device_id} 温度偏高 {temp:.1f}°C",
+                "timestamp": now_iso,
+            })
+        for device_id, hashrate, mining, _temp_over in walk.hashrate_low:
+            if mining:
+                alerts.append({
+                    "type": "hashrate",
+                    "severity": "warning",
+                    "device_id": device_id,
+                    "message": f"设备 {device_id} 算力过低 {hashrate:.1f}",
+                    "timestamp": now_iso,
+                })
+
+        # any() 在遇到第一个已连接矿池时就短路，不物化列表
+        if pools and not any(p.get("status") == "Connected" for p in pools):
+            alerts.append({
+                "type": "pool",
+                "severity": "critical",
+                "message": "没有已连接的矿池",
+                "timestamp": now_iso,
+            })
+
+        if status and status.get("hardware_errors", 0) > 100:
+            alerts.append({
+                "type": "hardware",
+                "severity": "warning",
+                "message": f"硬件错误累计 {status.get('hardware_errors')} 次",
+                "timestamp": now_iso,
+            })
+
+        return alerts
+
+    async def collect_performance_metrics(
+            self,
+            status: Optional[Dict[str, Any]] = None,
+            devices: Optional[List[Device]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """采集一次性能指标并追加到历史记录（保留 24 小时）
+
+        未提供快照时自行抓取 /status 和 /devices。
+        """
+        if status is None:
+            status = await self.get_status()
+        if devices is None:
+            devices = await self.get_devices()
+        return self._record_metrics(status, devices)
+
+    def _record_metrics(self, status: Optional[Dict[str, Any]],
+                        devices: List[Device],
+                        walk: Optional[DeviceWalk] = None) -> Optional[Dict[str, Any]]:
+        """把一组状态快照写入性能历史"""
+        if status is None:
+            return None
+
+        if walk is None:
+            walk = self._walk_devices(devices)
+
+        # 取一次墙钟时间；环形缓冲只存标量，无需逐周期淘汰
+        now = time.time()
+        metrics = {
+            "ts": now,
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "total_hashrate": status.get("total_hashrate", 0.0),
+            "accepted_shares": status.get("accepted_shares", 0),
+            "rejected_shares": status.get("rejected_shares", 0),
+            "hardware_errors": status.get("hardware_errors", 0),
+            "active_devices": status.get("active_devices", 0),
+            "uptime": status.get("uptime", 0),
+        }
+        self.performance_history.append(
+            ts=now,
+            hashrate=metrics["total_hashrate"],
+            accepted=metrics["accepted_shares"],
+            rejected=metrics["rejected_shares"],
+            hw_errors=metrics["hardware_errors"],
+            active=metrics["active_devices"],
+            uptime=metrics["uptime"],
+        )
+        self._last_walk = walk
+        return metrics
+
+    def generate_report(self) -> Dict[str, Any]:
+        """基于性能历史生成汇总报告"""
+        hist = self.performance_history
+        if len(hist) == 0:
+            return {"error": "暂无性能数据"}
+
+        ts = hist.column("ts")
+        hashrates = hist.column("hashrate")
+        if np is not None:
+            average_hashrate = float(hashrates.mean())
+        else:
+            average_hashrate = sum(hashrates) / len(hashrates)
+
+        report: Dict[str, Any] = {
+            "generated_at": datetime.now().isoformat(),
+            # 直接用采样时保存的 epoch 浮点数，省去 ISO 字符串解析
+            "period_hours": round(float(ts[-1] - ts[0]) / 3600, 2),
+            "samples": len(hist),
+            "current_hashrate": float(hashrates[-1]),
+            "average_hashrate": average_hashrate,
+            "accepted_shares": int(hist.column("accepted")[-1]),
+            "rejected_shares": int(hist.column("rejected")[-1]),
+            "hardware_errors": int(hist.column("hw_errors")[-1]),
+            "active_devices": int(hist.column("active")[-1]),
+        }
+        if self._last_walk is not None:
+            temperature = _stats(self._last_walk.temps)
+            if temperature is not None:
+                report["temperature"] = temperature
+            device_hashrate = _stats(self._last_walk.hashrates)
+            if device_hashrate is not None:
+                report["device_hashrate"] = device_hashrate
+        return report
+
+    def send_email_alert(self, alerts: List[Dict[str, Any]],
+                         smtp_config: Dict[str, Any]) -> None:
+        """通过 SMTP 发送告警邮件"""
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg["From"] = smtp_config["from"]
+        msg["To"] = smtp_config["to"]
+        msg["Subject"] = f"CGMiner-RS 告警 ({len(alerts)} 条)"
+
+        lines = [
+            f"[{alert['severity'].upper()}] {alert['type']}: "
+            f"{alert['message']} ({alert['timestamp']})"
+            for alert in alerts
+        ]
+        msg.attach(MIMEText("\n".join(lines) + "\n", "plain", "utf-8"))
+
+        try:
+            self._get_smtp(smtp_config).send_message(msg)
+            self.logger.info("已发送告警邮件: %d 条", len(alerts))
+        except Exception as e:
+            self.logger.error("发送告警邮件失败: %s", e)
+            self._drop_smtp()
+
+    def _get_smtp(self, smtp_config: Dict[str, Any]) -> "smtplib.SMTP":
+        """返回长连接 SMTP 会话，noop 探活失败时重建
+
+        只在邮件线程内调用，避免跨线程共享连接。
+        """
+        import smtplib
+
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except Exception:
+                self._drop_smtp()
+
+        server = smtplib.SMTP(smtp_config["host"], smtp_config.get("port", 587),
+                              timeout=15)
+        server.starttls()
+        if smtp_config.get("user"):
+            server.login(smtp_config["user"], smtp_config["password"])
+        self._smtp = server
+        return server
+
+    def _drop_smtp(self) -> None:
+        """丢弃当前 SMTP 连接"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    async def monitor_continuous(self, interval: int = 60,
+                                 smtp_config: Optional[Dict[str, Any]] = None) -> None:
+        """持续监控主循环"""
+        self.logger.info("开始持续监控 %s, 间隔 %ds", self.base_url, interval)
+        try:
+            await self._monitor_loop(interval, smtp_config)
+        finally:
+            await self.close()
+
+    async def _monitor_loop(self, interval: int,
+                            smtp_config: Optional[Dict[str, Any]]) -> None:
+        # 基于截止时间的调度：慢周期不会让采样点逐渐后移，
+        # 报告里的时间网格保持稳定。
+        deadline = time.monotonic()
+        while True:
+            try:
+                await self._poll_cycle(smtp_config)
+            except Exception as e:
+                self.logger.error("监控循环异常: %s", e)
+
+            deadline += interval
+            delay = deadline - time.monotonic()
+            if delay < -2 * interval:
+                # 落后太多时重置基准，避免一串零间隔的补跑周期
+                self.logger.warning("轮询落后 %.1fs，重置调度基准", -delay)
+                deadline = time.monotonic() + interval
+                delay = interval
+            await asyncio.sleep(max(0.0, delay))
+
+    async def _poll_cycle(self, smtp_config: Optional[Dict[str, Any]]) -> None:
+        """执行一次 REST 轮询周期：抓取、告警检查、指标采集
+
+        优先使用聚合快照端点（一次往返），不可用时并发抓取三个端点。
+        """
+        snapshot = None
+        try:
+            snapshot = await self.get_snapshot()
+        except Exception as e:
+            self.logger.error("获取聚合快照失败: %s", e)
+
+        if snapshot is not None:
+            status, devices, pools = snapshot
+        else:
+            status, devices, pools = await asyncio.gather(
+                self.get_status(), self.get_devices(), self.get_pools(),
+                return_exceptions=True,
+            )
+        if isinstance(status, BaseException):
+            self.logger.error("获取系统状态失败: %s", status)
+            status = None
+        if isinstance(devices, BaseException):
+            self.logger.error("获取设备列表失败: %s", devices)
+            devices = []
+        if isinstance(pools, BaseException):
+            self.logger.error("获取矿池列表失败: %s", pools)
+            pools = []
+
+        # 一趟设备遍历供告警检查和指标采集共用
+        walk = self._walk_devices(devices)
+        self._emit_alerts(self.check_alerts(status, devices, pools, walk),
+                          smtp_config)
+        # 复用本周期快照，不再重复抓取 /status 和 /devices
+        self._record_metrics(status, devices, walk)
+
+        if status:
+            self.logger.info(
+                "状态: %s 算力: %.1f 设备: %d 接受/拒绝: %d/%d",
+                status.get("mining_state"),
+                status.get("total_hashrate", 0.0),
+                status.get("active_devices", 0),
+                status.get("accepted_shares", 0),
+                status.get("rejected_shares", 0))
+
+    def _emit_alerts(self, alerts: List[Dict[str, Any]],
+                     smtp_config: Optional[Dict[str, Any]]) -> None:
+        """记录告警日志并在配置了 SMTP 时发送邮件
+
+        持续存在的异常每个周期都会重新产生同样的告警，
+        邮件按告警标识（类型 + 级别 + 设备）做冷却去重，窗口内只发一次。
+        级别参与键值，warning 升级到 critical 不会被冷却吞掉；
+        消息文本里带有当次测量值，逐周期抖动，不能用作去重键。
+        """
+        for alert in alerts:
+            self.logger.warning("告警 [%s] %s", alert["type"], alert["message"])
+        if not alerts or not smtp_config:
+            return
+
+        now = time.monotonic()
+        # 先清掉窗口外的记录，表里只留仍在冷却中的键
+        for key in [k for k, t in self._alert_cooldown.items()
+                    if now - t > ALERT_COOLDOWN]:
+            del self._alert_cooldown[key]
+
+        fresh = []
+        for alert in alerts:
+            # 矿池 / 硬件告警没有 device_id，设备位退化为 None
+            key = (alert["type"], alert["severity"], alert.get("device_id"))
+            if key not in self._alert_cooldown:
+                self._alert_cooldown[key] = now
+                fresh.append(alert)
+        if not fresh:
+            return
+        # 后台线程发信，SMTP 慢时不阻塞下一个监控周期
+        self._get_mail_pool().submit(self.send_email_alert, fresh, smtp_config)
+
+    async def monitor_websocket(self, interval: int = 60,
+                                smtp_config: Optional[Dict[str, Any]] = None,
+                                max_backoff: int = 300) -> None:
+        """WebSocket 推送监控：状态变化时才收到更新，替代固定间隔轮询
+
+        连接断开时按原 interval 节奏回退到 REST 轮询，重连以指数退避，
+        退避再长也不会让监控变得比轮询模式更稀疏。
+        """
+        if aiohttp is None:
+            self.logger.warning("未安装 aiohttp，WebSocket 模式不可用，回退到轮询监控")
+            await self.monitor_continuous(interval, smtp_config)
+            return
+
+        ws_url = self.base_url.replace("http", "ws", 1) + "/api/v1/ws"
+        backoff = 1
+        self.logger.info("开始 WebSocket 监控 %s", ws_url)
+        try:
+            while True:
+                try:
+                    session = self._get_session()
+                    async with session.ws_connect(ws_url, heartbeat=30) as ws:
+                        self.logger.info("WebSocket 已连接")
+                        backoff = 1
+                        await ws.send_json({
+                            "type": "Subscribe",
+                            "events": ["status", "devices", "pools", "mining_events"],
+                        })
+                        async for msg in ws:
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                continue
+                            frame = msg.json()
+                            if frame.get("type") == "Ping":
+                                await ws.send_json({"type": "Pong"})
+                                continue
+                            self._on_ws_message(frame, smtp_config)
+                    self.logger.warning("WebSocket 连接已关闭")
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    self.logger.error("WebSocket 连接失败: %s", e)
+
+                # 断线期间保持 interval 节奏的回退轮询，重连按指数退避
+                self.logger.info("%ds 后重连 WebSocket，期间继续轮询", backoff)
+                resume = time.monotonic() + backoff
+                while True:
+                    try:
+                        await self._poll_cycle(smtp_config)
+                    except Exception as e:
+                        self.logger.error("回退轮询失败: %s", e)
+                    remaining = resume - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    await asyncio.sleep(min(interval, remaining))
+                backoff = min(backoff * 2, max_backoff)
+        finally:
+            await self.close()
+
+    def _on_ws_message(self, frame: Dict[str, Any],
+                       smtp_config: Optional[Dict[str, Any]]) -> None:
+        """处理一帧推送消息：更新缓存快照并触发告警 / 指标采集"""
+        frame_type = frame.get("type")
+        data = frame.get("data")
+
+        if frame_type == "StatusUpdate":
+            self.last_status = data
+        elif frame_type == "DeviceUpdate" and data is not None:
+            device = Device.from_dict(data)
+            merged = {d.device_id: d for d in self.last_devices}
+            merged[device.device_id] = device
+            self.last_devices = list(merged.values())
+        elif frame_type == "PoolUpdate" and data is not None:
+            merged = {p.get("pool_id"): p for p in self.last_pools}
+            merged[data.get("pool_id")] = data
+            self.last_pools = list(merged.values())
+        elif frame_type == "MiningEvent":
+            self.logger.debug("挖矿事件: %s", frame.get("event"))
+            return
+        else:
+            return
+
+        walk = self._walk_devices(self.last_devices)
+        self._emit_alerts(
+            self.check_alerts(self.last_status, self.last_devices,
+                              self.last_pools, walk),
+            smtp_config)
+        # 只在状态帧上采样性能指标，避免设备帧刷爆历史记录
+        if frame_type == "StatusUpdate":
+            self._record_metrics(self.last_status, self.last_devices, walk)
+
+
+async def _run_once(monitor: CGMinerMonitor, coro: Any) -> Any:
+    """执行单次查询并在结束时关闭 HTTP 会话"""
+    try:
+        return await coro
+    finally:
+        await monitor.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CGMiner-RS 监控客户端")
+    parser.add_argument("mode", choices=["status", "health", "report", "monitor"],
+                        help="运行模式")
+    parser.add_argument("--host", default="127.0.0.1", help="API 主机地址")
+    parser.add_argument("--port", type=int, default=8080, help="API 端口")
+    parser.add_argument("--token", help="API 认证令牌 (Bearer)")
+    parser.add_argument("--interval", type=int, default=60, help="监控轮询间隔（秒）")
+    parser.add_argument("--websocket", action="store_true",
+                        help="monitor 模式下使用 WebSocket 推送而非轮询")
+    parser.add_argument("--smtp-host", help="SMTP 服务器地址（启用邮件告警）")
+    parser.add_argument("--smtp-port", type=int, default=587, help="SMTP 端口")
+    parser.add_argument("--smtp-user", help="SMTP 用户名")
+    parser.add_argument("--smtp-password", help="SMTP 密码")
+    parser.add_argument("--email-from", help="告警邮件发件人")
+    parser.add_argument("--email-to", help="告警邮件收件人")
+    parser.add_argument("--log-json", action="store_true",
+                        help="以单行 JSON 格式输出日志")
+    parser.add_argument("-v", "--verbose", action="store_true", help="调试日志")
+    args = parser.parse_args()
+
+    # uvloop 在 Linux 上可显著降低事件循环开销，装了就用，没装照常跑
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    handler = logging.StreamHandler()
+    if args.log_json:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        handlers=[handler],
+    )
+
+    monitor = CGMinerMonitor(args.host, args.port, args.token)
+
+    smtp_config = None
+    if args.smtp_host:
+        smtp_config = {
+            "host": args.smtp_host,
+            "port": args.smtp_port,
+            "user": args.smtp_user,
+            "password": args.smtp_password,
+            "from": args.email_from or args.smtp_user,
+            "to": args.email_to,
+        }
+
+    try:
+        if args.mode == "status":
+            status = asyncio.run(_run_once(monitor, monitor.get_status()))
+            print(json.dumps(status, indent=2, ensure_ascii=False))
+        elif args.mode == "health":
+            health = asyncio.run(_run_once(monitor, monitor.check_health()))
+            print(json.dumps(health, indent=2, ensure_ascii=False))
+            return 0 if health["healthy"] else 1
+        elif args.mode == "report":
+            asyncio.run(_run_once(monitor, monitor.collect_performance_metrics()))
+            print(json.dumps(monitor.generate_report(), indent=2, ensure_ascii=False))
+        elif args.mode == "monitor":
+            if args.websocket:
+                asyncio.run(monitor.monitor_websocket(args.interval, smtp_config))
+            else:
+                asyncio.run(monitor.monitor_continuous(args.interval, smtp_config))
+    except KeyboardInterrupt:
+        print("监控已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 use crate::api::{
     AppState, ApiResponse, SystemStatusResponse, DeviceStatusResponse,
-    PoolStatusResponse, StatsResponse, ConfigUpdateRequest, ControlRequest, ControlResponse
+    PoolStatusResponse, SnapshotResponse, StatsResponse, ConfigUpdateRequest,
+    ControlRequest, ControlResponse
 };
 use axum::{
     extract::{Path, State, Query},
@@ -10,12 +11,10 @@ use axum::{
 use serde::Deserialize;
 use tracing::info;
 
-/// 获取系统状态
-pub async fn get_system_status(
-    State(state): State<AppState>,
-) -> Result<Json<ApiResponse<SystemStatusResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
+/// 从挖矿管理器组装系统状态响应
+async fn build_system_status(state: &AppState) -> SystemStatusResponse {
     let status = state.mining_manager.get_system_status().await;
-    let response = SystemStatusResponse {
+    SystemStatusResponse {
         version: env!("CARGO_PKG_VERSION").to_string(),
         uptime: status.uptime.as_secs(),
         mining_state: format!("{:?}", status.state),
@@ -27,9 +26,30 @@ pub async fn get_system_status(
         connected_pools: status.connected_pools,
         current_difficulty: status.current_difficulty,
         best_share: status.best_share,
+    }
+}
+
+/// 获取系统状态
+pub async fn get_system_status(
+    State(state): State<AppState>,
+) -> Result<Json<ApiResponse<SystemStatusResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
+    Ok(Json(ApiResponse::success(build_system_status(&state).await)))
+}
+
+/// 获取聚合快照：状态 + 设备 + 矿池一次返回
+///
+/// 与 /status、/devices、/pools 三个端点使用相同的内部状态，
+/// 监控客户端每个周期只需一次往返。
+pub async fn get_snapshot(
+    State(state): State<AppState>,
+) -> Result<Json<ApiResponse<SnapshotResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
+    let snapshot = SnapshotResponse {
+        status: build_system_status(&state).await,
+        devices: list_devices(),
+        pools: list_pools(),
     };
 
-    Ok(Json(ApiResponse::success(response)))
+    Ok(Json(ApiResponse::success(snapshot)))
 }
 
 /// 获取统计信息
@@ -78,9 +98,14 @@ pub async fn get_stats(
 pub async fn get_devices(
     State(_state): State<AppState>,
 ) -> Result<Json<ApiResponse<Vec<DeviceStatusResponse>>>, (StatusCode, Json<ApiResponse<()>>)> {
+    Ok(Json(ApiResponse::success(list_devices())))
+}
+
+/// 组装设备列表
+fn list_devices() -> Vec<DeviceStatusResponse> {
     // 这里应该从设备管理器获取实际的设备列表
     // 为了简化，我们返回模拟数据
-    let devices = vec![
+    vec![
         DeviceStatusResponse {
             device_id: 0,
             name: "Maijie L7 Chain 0".to_string(),
@@ -111,9 +136,7 @@ pub async fn get_devices(
                 .unwrap()
                 .as_secs()),
         },
-    ];
-
-    Ok(Json(ApiResponse::success(devices)))
+    ]
 }
 
 /// 获取单个设备
@@ -192,9 +215,14 @@ pub async fn update_device_config(
 pub async fn get_pools(
     State(_state): State<AppState>,
 ) -> Result<Json<ApiResponse<Vec<PoolStatusResponse>>>, (StatusCode, Json<ApiResponse<()>>)> {
+    Ok(Json(ApiResponse::success(list_pools())))
+}
+
+/// 组装矿池列表
+fn list_pools() -> Vec<PoolStatusResponse> {
     // 这里应该从矿池管理器获取实际的矿池列表
     // 为了简化，我们返回模拟数据
-    let pools = vec![
+    vec![
         PoolStatusResponse {
             pool_id: 0,
             url: "stratum+tcp://pool.example.com:4444".to_string(),
@@ -222,9 +250,7 @@ pub async fn get_pools(
             ping: None,
             connected_at: None,
         },
-    ];
-
-    Ok(Json(ApiResponse::success(pools)))
+    ]
 }
 
 /// 获取单个矿池
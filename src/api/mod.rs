@@ -98,6 +98,14 @@ pub struct PoolStatusResponse {
     pub connected_at: Option<u64>,
 }
 
+/// 聚合快照响应：一次请求返回状态 + 设备 + 矿池
+#[derive(Debug, Clone, Serialize, Deserialize)]
+pub struct SnapshotResponse {
+    pub status: SystemStatusResponse,
+    pub devices: Vec<DeviceStatusResponse>,
+    pub pools: Vec<PoolStatusResponse>,
+}
+
 /// 统计信息响应
 #[derive(Debug, Serialize, Deserialize)]
 pub struct StatsResponse {
@@ -239,6 +247,7 @@ pub fn create_routes(state: AppState) -> Router {
         // 系统状态路由
         .route("/api/v1/status", get(get_system_status))
         .route("/api/v1/stats", get(get_stats))
+        .route("/api/v1/snapshot", get(get_snapshot))
 
         // 设备管理路由
         .route("/api/v1/devices", get(get_devices))
@@ -256,7 +265,7 @@ pub fn create_routes(state: AppState) -> Router {
         .route("/api/v1/config", post(update_config))
 
         // WebSocket 路由
-        .route("/api/v1/ws", get(websocket_handler))
+        .route("/api/v1/ws", get(websocket::websocket_handler))
 
         // 健康检查
         .route("/health", get(health_check))
@@ -273,10 +282,3 @@ pub fn create_routes(state: AppState) -> Router {
 async fn health_check() -> Result<Json<ApiResponse<String>>, StatusCode> {
     Ok(Json(ApiResponse::success("OK".to_string())))
 }
-
-/// WebSocket 处理器
-async fn websocket_handler() -> Result<Json<ApiResponse<String>>, StatusCode> {
-    // 这里应该升级到 WebSocket 连接
-    // 暂时返回错误，具体实现在 websocket.rs 中
-    Err(StatusCode::NOT_IMPLEMENTED)
-}